@@ -3,15 +3,17 @@
 # ============================================================================
 
 import os
+import asyncio
 import time
 import logging
-import csv
+import uuid
 from pathlib import Path
 from typing import List
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
 import pandas as pd
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ASCENDING
+from pymongo.errors import BulkWriteError
 
 # ================================
 # CONFIGURATION (Shared)
@@ -20,8 +22,9 @@ from pymongo import MongoClient
 BASE_URL = "https://gwdata.cgwb.gov.in/WaterLevel/DWLR"
 DOWNLOAD_DIR = "CGWB"
 OUTPUT_CSV_ALL = "Coimbatore_CGWB_All_Data.csv"
-OUTPUT_CSV_FILTERED = "Coimbatore_CGWB_2025_Filtered.csv"
 OUTPUT_CSV_MERGED = "Coimbatore_CGWB_2025_Merged.csv"
+# Present while a scrape is running; a run that finds it resumes the master CSV
+SCRAPE_MARKER = ".scrape_in_progress"
 
 AGENCY = "CGWB"
 STATE = "Tamil Nadu"
@@ -29,13 +32,24 @@ DISTRICT = "Coimbatore"
 
 # Months to keep (January, April, August, November)
 MONTHS_TO_KEEP = [1, 4, 8, 11]
+MONTH_NAMES = {1: "Jan", 4: "Apr", 8: "Aug", 11: "Nov"}
 YEAR = 2025
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+CSV_READ_BUFFER = 1 << 20   # 1 MiB
+CSV_WRITE_BUFFER = 1 << 20  # 1 MiB
 
 # MongoDB Configuration
-MONGODB_URI = process.env.MONGO_URL
+# Optional so scraping/filtering still run without it; step 4 reports a missing URL
+MONGODB_URI = os.environ.get("MONGO_URL")
 DATABASE_NAME = "Jal_Shakti"
 COLLECTION_NAME = "well_data"
-CSV_FILE_FOR_MONGODB = f"CGWB/{OUTPUT_CSV_MERGED}"
+MONGO_POOL_SIZE = 50
+# zstd/snappy are used when their libraries are installed, zlib otherwise
+MONGO_COMPRESSORS = "zstd,snappy,zlib"
+# Acknowledged by a majority of the replica set; 1 acknowledges on the primary only
+MONGO_WRITE_CONCERN = "majority"
+# Each import stages into its own "<prefix>_<id>" collection
+STAGING_COLLECTION_PREFIX = f"{COLLECTION_NAME}_stage"
 
 # Selectors
 SELECTORS = {
@@ -45,6 +59,48 @@ SELECTORS = {
     'district': '#DistrictCode',
     'block': '#BlockCode',
 }
+WELL_RADIO_SELECTOR = "table tbody tr input[type='radio']"
+XHR_WAIT_TIMEOUT = 5000
+
+# Number of browser contexts downloading wells in parallel
+SCRAPER_CONCURRENCY = 4
+
+# Scrape progress is logged at INFO this many times per run (per-well details go to DEBUG)
+LOG_PROGRESS_STEPS = 10
+
+# Browser launch settings
+HEADLESS = True
+CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-extensions",
+    "--blink-settings=imagesEnabled=false",
+]
+# Stylesheets are kept: the scraper relies on is_visible() checks
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "websocket"}
+
+# Saved browser session (cookies/localStorage) reused while younger than this
+SESSION_STATE_FILE = "cgwb_state.json"
+SESSION_STATE_MAX_AGE = 24 * 60 * 60  # seconds
+# Records whether the site actually restored the filter from a saved session
+# ("1"/"0"); probed again once older than SESSION_STATE_MAX_AGE
+SESSION_RESTORE_FILE = "cgwb_state.restore"
+# How long to wait for a restored session to show the filtered table
+SESSION_TABLE_TIMEOUT = 5000
+
+# Metadata columns prepended to every downloaded well CSV
+WELL_INFO_COLUMNS = {
+    'well_id': 'Well_ID',
+    'village': 'Village',
+    'latitude': 'Latitude',
+    'longitude': 'Longitude',
+    'block': 'Block',
+}
+
+# Repeated on every reading of a well, so stored as categoricals
+CATEGORY_COLUMNS = ['Well_ID', 'Village', 'Block']
 
 # Setup logging
 logging.basicConfig(
@@ -65,256 +121,515 @@ Path(DOWNLOAD_DIR).mkdir(parents=True, exist_ok=True)
 # SCRIPT 1: WEB SCRAPER WITH LAT/LONG
 # ============================================================================
 
-def process_downloaded_csv(download_path: Path, well_info: dict, csv_writer, headers_written: list) -> bool:
-    """Read downloaded CSV and append to master CSV with additional columns."""
+def process_downloaded_csv(download_path: Path, well_info: dict, header: dict):
+    """Read downloaded CSV and return it with the well's metadata columns added.
+
+    The first export fixes the master column order in ``header['fieldnames']``
+    (unless a resumed run seeded it from the existing master CSV) and caches
+    its raw header line and parsed columns. Later exports whose
+    header line matches are read with the cached names and no realignment;
+    any other header is aligned to the master order so a reordered or extra
+    column can't shift values. Returns None if the export could not be processed.
+    """
     try:
-        with open(download_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            if not headers_written[0]:
-                fieldnames = ['Well_ID', 'Village', 'Latitude', 'Longitude', 'Block'] + list(reader.fieldnames)
-                csv_writer.writerow(fieldnames)
-                headers_written[0] = True
-            
-            for row in reader:
-                csv_writer.writerow([
-                    well_info['well_id'], 
-                    well_info['village'],
-                    well_info['latitude'], 
-                    well_info['longitude'], 
-                    well_info['block']
-                ] + list(row.values()))
-        
-        download_path.unlink()
-        return True
+        # A known date format skips per-file format inference; a file that doesn't
+        # match keeps Date as text and is coerced later in filter_cgwb_data
+        with open(download_path, 'r', encoding='utf-8', newline='', buffering=CSV_READ_BUFFER) as f:
+            header_line = f.readline()
+            f.seek(0)
+            same_header = header_line == header['line']
+            sub = pd.read_csv(f, parse_dates=["Date"], date_format=DATE_FORMAT, dtype={"WellNo": str},
+                              **({'names': header['columns'], 'header': 0} if same_header else {}))
+        sub = sub.assign(**{col: well_info[key] for key, col in WELL_INFO_COLUMNS.items()})
+
+        if header['line'] is None:
+            metadata_cols = list(WELL_INFO_COLUMNS.values())
+            header['line'] = header_line
+            header['columns'] = [col for col in sub.columns if col not in metadata_cols]
+            header['fieldnames'] = header['fieldnames'] or metadata_cols + header['columns']
+            same_header = header['fieldnames'] == metadata_cols + header['columns']
+
+        if same_header:
+            sub = sub[header['fieldnames']]
+        else:
+            sub = sub.reindex(columns=header['fieldnames'], fill_value='')
+
+        download_path.unlink(missing_ok=True)
+        return sub
         
     except Exception as e:
         logger.error(f"Error processing CSV file: {e}")
+        return None
+
+
+async def wait_for_options(page, selector: str, timeout: int = 10000):
+    """Wait until a dependent dropdown has been repopulated by the site."""
+    await page.wait_for_function(
+        """(selector) => {
+            const el = document.querySelector(selector);
+            return el && el.options.length >= 2;
+        }""",
+        arg=selector,
+        timeout=timeout
+    )
+
+
+def is_xhr_response(response) -> bool:
+    return response.request.resource_type in ("xhr", "fetch")
+
+
+async def run_and_wait_for_xhr(page, action, timeout: int = XHR_WAIT_TIMEOUT):
+    """Run a page action and wait for the XHR it triggers; moves on if none arrives.
+
+    Errors from the action itself (including its own timeouts) are raised to the caller.
+    """
+    action_failed = False
+    try:
+        async with page.expect_response(is_xhr_response, timeout=timeout):
+            try:
+                await action()
+            except BaseException:
+                action_failed = True
+                raise
+    except PlaywrightTimeout:
+        if action_failed:
+            raise
+        logger.debug("No XHR response after page action")
+
+
+def cached_session_state():
+    """Return the saved session file if it is fresh enough to reuse, else None."""
+    path = Path(SESSION_STATE_FILE)
+    try:
+        if time.time() - path.stat().st_mtime < SESSION_STATE_MAX_AGE:
+            return str(path)
+    except OSError:
+        pass
+    return None
+
+
+async def save_session_state(context):
+    """Snapshot the context's cookies/localStorage so the next run can skip the filter flow."""
+    try:
+        await context.storage_state(path=SESSION_STATE_FILE)
+    except Exception as e:
+        logger.warning(f"Could not save session state: {e}")
+
+
+def session_restores():
+    """Return True/False once a saved session has been tried, None before that.
+
+    The result expires like the session itself, so a probe that failed once
+    (slow page, site hiccup) is retried on a later run.
+    """
+    path = Path(SESSION_RESTORE_FILE)
+    try:
+        if time.time() - path.stat().st_mtime >= SESSION_STATE_MAX_AGE:
+            return None
+        return path.read_text().strip() == "1"
+    except OSError:
+        return None
+
+
+def remember_session_restore(restored: bool):
+    """Store whether the saved session brought back the filtered table."""
+    try:
+        Path(SESSION_RESTORE_FILE).write_text("1" if restored else "0")
+    except OSError as e:
+        logger.warning(f"Could not save session restore result: {e}")
+
+
+async def wells_table_restored(page) -> bool:
+    """Check whether a restored session already shows the wells table for DISTRICT."""
+    try:
+        await page.wait_for_selector(WELL_RADIO_SELECTOR, timeout=SESSION_TABLE_TIMEOUT)
+        district = await page.evaluate(
+            "(selector) => document.querySelector(selector)?.selectedOptions[0]?.textContent.trim()",
+            SELECTORS['district']
+        )
+        return district == DISTRICT
+    except Exception:
         return False
 
 
-def scrape_coimbatore_data():
-    """Main scraping function for Coimbatore district - all wells at once."""
-    stats = {'wells_found': 0, 'wells_downloaded': 0, 'wells_failed': 0}
+async def open_wells_table(page, probe_session: bool = False) -> List[dict]:
+    """Open the wells table for DISTRICT and return the well rows.
+
+    A fresh saved session may bring the site back with the filter already
+    applied. That is only waited for once it is known to work; before the
+    first try it is checked on the ``probe_session`` page only, so a site that
+    never restores costs a single short wait. Otherwise the full selection
+    flow runs.
+    """
+    logger.info("🌐 Opening website...")
+    await page.goto(BASE_URL, timeout=60000)
+    await page.wait_for_load_state("networkidle", timeout=30000)
     
-    output_path = Path(DOWNLOAD_DIR) / OUTPUT_CSV_ALL
-    csv_file = open(output_path, 'w', newline='', encoding='utf-8')
-    csv_writer = csv.writer(csv_file)
-    headers_written = [False]
+    restores = session_restores()
+    restored = False
+    if cached_session_state() and (restores or (probe_session and restores is None)):
+        restored = await wells_table_restored(page)
+        remember_session_restore(restored)
+    
+    if restored:
+        logger.info(f"♻ Reusing saved filter selection for {DISTRICT}")
+    else:
+        await select_filters(page)
     
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
-            context = browser.new_context(accept_downloads=True)
-            page = context.new_page()
-            
-            try:
-                logger.info("🌐 Opening website...")
-                page.goto(BASE_URL, timeout=60000)
-                page.wait_for_load_state("networkidle", timeout=30000)
-                time.sleep(3)
-                
-                logger.info(f"✅ Selecting Agency: {AGENCY}")
-                agency_dropdown = page.locator(SELECTORS['agency'])
-                agency_dropdown.wait_for(state="visible", timeout=10000)
-                agency_dropdown.select_option(label=AGENCY)
-                time.sleep(2)
-                
-                logger.info(f"✅ Selecting Project: --All--")
-                project_dropdown = page.locator(SELECTORS['project'])
-                project_dropdown.wait_for(state="visible", timeout=10000)
-                try:
-                    project_dropdown.select_option(label="--All--")
-                except:
-                    project_dropdown.select_option(index=1)
-                time.sleep(2)
-                
-                time.sleep(3)
-                
-                logger.info(f"✅ Selecting State: {STATE}")
-                page.locator(SELECTORS['state']).select_option(label=STATE)
-                time.sleep(2)
-                
-                page.wait_for_function(
-                    f"""() => {{
-                        const el = document.querySelector("{SELECTORS['district']}");
-                        return el && el.options.length >= 2;
-                    }}""",
-                    timeout=10000
-                )
-                time.sleep(1)
-                
-                logger.info(f"✅ Selecting District: {DISTRICT}")
-                page.locator(SELECTORS['district']).select_option(label=DISTRICT)
-                time.sleep(2)
-                
-                logger.info(f"🔍 Clicking Filter button to load all wells...")
-                try:
-                    filter_button = page.locator("button:has-text('Filter')")
-                    filter_button.click()
-                    time.sleep(3)
-                except Exception as e:
-                    logger.error(f"Error clicking Filter: {e}")
-                    return
-                
-                logger.info(f"⏳ Waiting for wells table to load...")
-                page.wait_for_selector("table tbody tr", timeout=15000)
-                time.sleep(2)
-                
-                try:
-                    length_selector = page.locator("select[name='simpletable_length']")
-                    length_selector.wait_for(state="visible", timeout=5000)
-                    length_selector.select_option(value="50")
-                    time.sleep(2)
-                except Exception as e:
-                    logger.warning(f"Could not change table length: {e}")
-                
-                radio_buttons = page.locator("table tbody tr input[type='radio']").all()
-                stats['wells_found'] = len(radio_buttons)
-                
-                if stats['wells_found'] == 0:
-                    logger.error(f"❌ No wells found for {DISTRICT}")
-                    return
-                
-                logger.info(f"📍 Found {stats['wells_found']} well(s) in {DISTRICT}")
-                logger.info(f"🚀 Starting to process all wells...\n")
-                
-                for idx in range(1, stats['wells_found'] + 1):
-                    try:
-                        logger.info(f"[{idx}/{stats['wells_found']}] Processing well...")
-                        
-                        current_radio_buttons = page.locator("table tbody tr input[type='radio']").all()
-                        if idx > len(current_radio_buttons):
-                            logger.warning(f"   ⚠ Well {idx} not found in table")
-                            stats['wells_failed'] += 1
-                            continue
-                        
-                        radio = current_radio_buttons[idx - 1]
-                        radio.scroll_into_view_if_needed()
-                        radio.click()
-                        time.sleep(1)
-                        
-                        page.wait_for_selector("button:has-text('Export')", timeout=5000)
-                        
-                        tabular_tab = page.locator("a:has-text('Tabular View'), button:has-text('Tabular View')")
-                        if tabular_tab.is_visible():
-                            tabular_tab.click()
-                            time.sleep(1)
-                        
-                        well_info = {
-                            'well_id': f'well_{idx}', 
-                            'village': 'Unknown',
-                            'latitude': 'Unknown', 
-                            'longitude': 'Unknown',
-                            'block': 'Unknown'
-                        }
-                        try:
-                            row = radio.locator("xpath=ancestor::tr")
-                            cells = row.locator("td").all_text_contents()
-                            if len(cells) >= 5:
-                                well_info['well_id'] = cells[1].strip() or f'well_{idx}'
-                                well_info['village'] = cells[2].strip() or 'Unknown'
-                                well_info['latitude'] = cells[3].strip() or 'Unknown'
-                                well_info['longitude'] = cells[4].strip() or 'Unknown'
-                            
-                            logger.info(f"   Well ID: {well_info['well_id']}")
-                            logger.info(f"   Village: {well_info['village']}")
-                            logger.info(f"   Lat: {well_info['latitude']}, Long: {well_info['longitude']}")
-                        except Exception as e:
-                            logger.warning(f"   Could not extract well info: {e}")
-                        
-                        export_btn = page.locator("button:has-text('Export')")
-                        temp_download_path = Path(DOWNLOAD_DIR) / f"temp_{idx}.csv"
-                        
-                        with page.expect_download(timeout=15000) as download_info:
-                            export_btn.click()
-                        
-                        download = download_info.value
-                        download.save_as(temp_download_path)
-                        
-                        if process_downloaded_csv(temp_download_path, well_info, csv_writer, headers_written):
-                            logger.info(f"   ✅ Added to master CSV")
-                            stats['wells_downloaded'] += 1
-                        else:
-                            logger.warning(f"   ⚠ Failed to process well data")
-                            stats['wells_failed'] += 1
-                        
-                        try:
-                            list_btn = page.locator("button.btn-list")
-                            if list_btn.is_visible(timeout=2000):
-                                list_btn.click()
-                                time.sleep(2)
-                            else:
-                                alt_selectors = [
-                                    "button:has-text('Close')",
-                                    "button.btn-primary.btn-list",
-                                    "i.feather.icon-menu >> xpath=.."
-                                ]
-                                for selector in alt_selectors:
-                                    btn = page.locator(selector)
-                                    if btn.is_visible(timeout=1000):
-                                        btn.click()
-                                        time.sleep(2)
-                                        break
-                        except Exception as e:
-                            logger.warning(f"   ⚠ Could not return to table: {e}")
-                        
-                        try:
-                            page.wait_for_selector("table tbody tr", timeout=5000)
-                            time.sleep(1)
-                        except:
-                            pass
-                        
-                        logger.info("")
-                        
-                    except PlaywrightTimeout:
-                        logger.warning(f"   ⚠ Timeout processing well {idx}\n")
-                        stats['wells_failed'] += 1
-                        continue
-                    except Exception as e:
-                        logger.error(f"   ❌ Error processing well {idx}: {e}\n")
-                        stats['wells_failed'] += 1
-                        continue
-                
-                logger.info("\n" + "="*60)
-                logger.info("🏁 SCRAPING COMPLETED")
-                logger.info(f"📊 Total wells found: {stats['wells_found']}")
-                logger.info(f"✅ Successfully downloaded: {stats['wells_downloaded']}")
-                logger.info(f"❌ Failed: {stats['wells_failed']}")
-                logger.info(f"📁 Output file: {output_path}")
-                logger.info("="*60)
-                
-            except Exception as e:
-                logger.error(f"Fatal error during scraping: {e}", exc_info=True)
-            finally:
-                browser.close()
-                
+        length_selector = page.locator("select[name='simpletable_length']")
+        await length_selector.wait_for(state="visible", timeout=5000)
+        await run_and_wait_for_xhr(page, lambda: length_selector.select_option(value="50"))
+        await page.wait_for_selector(WELL_RADIO_SELECTOR, timeout=5000)
+    except Exception as e:
+        logger.warning(f"Could not change table length: {e}")
+    
+    return await read_well_rows(page)
+
+
+async def select_filters(page):
+    """Run the agency → project → state → district → filter flow until the wells table loads."""
+    logger.info(f"✅ Selecting Agency: {AGENCY}")
+    agency_dropdown = page.locator(SELECTORS['agency'])
+    await agency_dropdown.wait_for(state="visible", timeout=10000)
+    await run_and_wait_for_xhr(page, lambda: agency_dropdown.select_option(label=AGENCY))
+    await wait_for_options(page, SELECTORS['project'])
+    
+    logger.info(f"✅ Selecting Project: --All--")
+    project_dropdown = page.locator(SELECTORS['project'])
+    await project_dropdown.wait_for(state="visible", timeout=10000)
+    try:
+        await run_and_wait_for_xhr(page, lambda: project_dropdown.select_option(label="--All--"))
+    except Exception:
+        await run_and_wait_for_xhr(page, lambda: project_dropdown.select_option(index=1))
+    await wait_for_options(page, SELECTORS['state'])
+    
+    logger.info(f"✅ Selecting State: {STATE}")
+    state_dropdown = page.locator(SELECTORS['state'])
+    await run_and_wait_for_xhr(page, lambda: state_dropdown.select_option(label=STATE))
+    await wait_for_options(page, SELECTORS['district'])
+    
+    logger.info(f"✅ Selecting District: {DISTRICT}")
+    await page.locator(SELECTORS['district']).select_option(label=DISTRICT)
+    
+    logger.info(f"🔍 Clicking Filter button to load all wells...")
+    try:
+        filter_button = page.locator("button:has-text('Filter')")
+        await run_and_wait_for_xhr(page, filter_button.click)
+    except Exception as e:
+        logger.error(f"Error clicking Filter: {e}")
+        raise
+    
+    logger.info(f"⏳ Waiting for wells table to load...")
+    await page.wait_for_selector(WELL_RADIO_SELECTOR, timeout=15000)
+
+
+async def read_well_rows(page) -> List[dict]:
+    """Read the metadata of every well row in the table with a single evaluate call."""
+    rows = await page.evaluate(
+        """(selector) => Array.from(document.querySelectorAll('table tbody tr'))
+            .filter(tr => tr.querySelector(selector))
+            .map(tr => {
+                const cells = tr.querySelectorAll('td');
+                const text = (i) => (cells.length >= 5 ? cells[i].textContent.trim() : '');
+                return {well_id: text(1), village: text(2), latitude: text(3), longitude: text(4)};
+            })""",
+        "input[type='radio']"
+    )
+    
+    return [
+        {
+            'well_id': row['well_id'] or f'well_{idx}',
+            'village': row['village'] or 'Unknown',
+            'latitude': row['latitude'] or 'Unknown',
+            'longitude': row['longitude'] or 'Unknown',
+            'block': 'Unknown'
+        }
+        for idx, row in enumerate(rows, start=1)
+    ]
+
+
+def collect_export(download_path: Path, idx: int, well_info: dict, header: dict, frames: list, out,
+                   stats: dict):
+    """Parse a downloaded export, append it to the master CSV and the collected frames."""
+    sub = process_downloaded_csv(download_path, well_info, header)
+    
+    if sub is not None:
+        # Appended as soon as the well is done, so an interrupted run can resume from here
+        # and flushed per well so a killed run leaves whole wells on disk
+        sub.to_csv(out, index=False, header=out.tell() == 0, date_format=DATE_FORMAT)
+        out.flush()
+        frames.append(sub)
+        logger.debug(f"   ✅ Collected {len(sub)} reading(s)")
+        stats['wells_downloaded'] += 1
+    else:
+        logger.warning(f"   ⚠ Failed to process well data")
+        stats['wells_failed'] += 1
+
+
+async def download_well(page, idx: int, well_info: dict, total: int, header: dict, frames: list, out,
+                        stats: dict):
+    """Export a single well from the table and collect its readings."""
+    try:
+        logger.debug(f"[{idx}/{total}] Processing well...")
+        logger.debug(f"   Well ID: {well_info['well_id']}")
+        logger.debug(f"   Village: {well_info['village']}")
+        logger.debug(f"   Lat: {well_info['latitude']}, Long: {well_info['longitude']}")
+        
+        # Locators are lazy, so addressing the row by index costs no round-trip;
+        # click() scrolls the radio into view itself
+        radio = page.locator(WELL_RADIO_SELECTOR).nth(idx - 1)
+        await radio.click(timeout=5000)
+        
+        await page.wait_for_selector("button:has-text('Export'):not([disabled])", timeout=5000)
+        
+        tabular_tab = page.locator("a:has-text('Tabular View'), button:has-text('Tabular View')")
+        if await tabular_tab.is_visible():
+            await tabular_tab.click()
+            await page.wait_for_selector("button:has-text('Export'):not([disabled])", timeout=5000)
+        
+        export_btn = page.locator("button:has-text('Export')")
+        
+        async with page.expect_download(timeout=15000) as download_info:
+            await export_btn.click()
+        
+        download = await download_info.value
+        # Read Playwright's own temp file instead of copying it with save_as()
+        download_path = Path(await download.path())
+        
+        collect_export(download_path, idx, well_info, header, frames, out, stats)
+        
+        try:
+            list_btn = page.locator("button.btn-list")
+            if await list_btn.is_visible(timeout=2000):
+                await list_btn.click()
+            else:
+                alt_selectors = [
+                    "button:has-text('Close')",
+                    "button.btn-primary.btn-list",
+                    "i.feather.icon-menu >> xpath=.."
+                ]
+                for selector in alt_selectors:
+                    btn = page.locator(selector)
+                    if await btn.is_visible(timeout=1000):
+                        await btn.click()
+                        break
+        except Exception as e:
+            logger.warning(f"   ⚠ Could not return to table: {e}")
+        
+        try:
+            await page.wait_for_selector(WELL_RADIO_SELECTOR, timeout=5000)
+        except PlaywrightTimeout:
+            pass
+        
+    except PlaywrightTimeout:
+        logger.warning(f"   ⚠ Timeout processing well {idx}\n")
+        stats['wells_failed'] += 1
+    except Exception as e:
+        logger.error(f"   ❌ Error processing well {idx}: {e}\n")
+        stats['wells_failed'] += 1
+
+
+def log_progress(total: int, stats: dict):
+    """Log scrape progress at INFO about LOG_PROGRESS_STEPS times per run."""
+    processed = stats['wells_resumed'] + stats['wells_downloaded'] + stats['wells_failed']
+    step = max(1, total // LOG_PROGRESS_STEPS)
+    # Workers share stats, so remember what was logged rather than testing processed % step
+    if processed - stats['wells_logged'] >= step or (processed == total and stats['wells_logged'] < total):
+        stats['wells_logged'] = processed
+        logger.info(f"[{processed}/{total}] wells processed "
+                    f"({stats['wells_downloaded']} downloaded, {stats['wells_failed']} failed)")
+
+
+async def scrape_wells(page, well_infos: List[dict], queue: asyncio.Queue, total: int, header: dict,
+                       frames: list, out, stats: dict):
+    """Take 1-based well indices off the shared queue and download them on a prepared page."""
+    while True:
+        try:
+            idx = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        
+        if idx > len(well_infos):
+            logger.warning(f"   ⚠ Well {idx} not found in table")
+            stats['wells_failed'] += 1
+            continue
+        await download_well(page, idx, well_infos[idx - 1], total, header, frames, out, stats)
+        log_progress(total, stats)
+
+
+async def block_unneeded_resources(route):
+    """Abort requests for resources the scraper never looks at."""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def new_scraper_context(browser):
+    """Create a download-enabled context that skips images, fonts and media.
+
+    A fresh saved session is loaded into it so the site can restore the last filter.
+    """
+    context = await browser.new_context(accept_downloads=True, storage_state=cached_session_state())
+    await context.route("**/*", block_unneeded_resources)
+    return context
+
+
+async def scrape_with_context(browser, queue: asyncio.Queue, total: int, header: dict, frames: list,
+                              out, stats: dict):
+    """Open a fresh context, rebuild the wells table and work through the shared queue.
+
+    If the table can't be rebuilt the worker just stops; its wells stay queued for the others.
+    """
+    context = await new_scraper_context(browser)
+    try:
+        page = await context.new_page()
+        well_infos = await open_wells_table(page)
+        await scrape_wells(page, well_infos, queue, total, header, frames, out, stats)
+    except Exception as e:
+        logger.error(f"Worker could not open the wells table: {e}")
     finally:
-        csv_file.close()
+        await context.close()
+
+
+async def scrape_coimbatore_data_async(frames: list, out, done: set, fieldnames: list):
+    """Scrape all Coimbatore wells, spreading them across browser contexts.
+
+    Wells whose ID is in ``done`` were saved by an earlier run and are skipped.
+    Returns the run's stats once every queued well has been attempted, or None.
+    """
+    stats = {'wells_found': 0, 'wells_resumed': 0, 'wells_downloaded': 0, 'wells_failed': 0,
+             'wells_logged': 0}
+    
+    # Export header shared by all wells, filled in from the first download
+    # (a resumed run keeps the master CSV's column order)
+    header = {'line': None, 'columns': None, 'fieldnames': fieldnames}
+    
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=HEADLESS, args=CHROMIUM_ARGS)
+        
+        try:
+            context = await new_scraper_context(browser)
+            page = await context.new_page()
+            well_infos = await open_wells_table(page, probe_session=True)
+            stats['wells_found'] = len(well_infos)
+            await save_session_state(context)
+            
+            if stats['wells_found'] == 0:
+                logger.error(f"❌ No wells found for {DISTRICT}")
+                return None
+            
+            queue = asyncio.Queue()
+            for idx, well_info in enumerate(well_infos, start=1):
+                if well_info['well_id'] in done:
+                    stats['wells_resumed'] += 1
+                else:
+                    queue.put_nowait(idx)
+            
+            logger.info(f"📍 Found {stats['wells_found']} well(s) in {DISTRICT}")
+            if stats['wells_resumed']:
+                logger.info(f"⏩ Skipping {stats['wells_resumed']} well(s) saved by a previous run")
+            if queue.empty():
+                return stats
+            
+            workers = min(SCRAPER_CONCURRENCY, queue.qsize())
+            logger.info(f"🚀 Starting to process all wells across {workers} context(s)...\n")
+            
+            # The first worker reuses the page that discovered the wells
+            await asyncio.gather(
+                scrape_wells(page, well_infos, queue, stats['wells_found'], header, frames, out, stats),
+                *(scrape_with_context(browser, queue, stats['wells_found'], header, frames, out, stats)
+                  for _ in range(workers - 1))
+            )
+            await save_session_state(context)
+            
+            logger.info("\n" + "="*60)
+            logger.info("🏁 SCRAPING COMPLETED")
+            logger.info(f"📊 Total wells found: {stats['wells_found']}")
+            logger.info(f"⏩ Already saved: {stats['wells_resumed']}")
+            logger.info(f"✅ Successfully downloaded: {stats['wells_downloaded']}")
+            logger.info(f"❌ Failed: {stats['wells_failed']}")
+            logger.info("="*60)
+            return stats
+            
+        except Exception as e:
+            logger.error(f"Fatal error during scraping: {e}", exc_info=True)
+            return None
+        finally:
+            await browser.close()
+
+
+def load_partial_scrape(output_path: Path) -> pd.DataFrame:
+    """Load the master CSV of an interrupted run for resuming.
+
+    Each well is written with one flushed to_csv call, so only a run killed
+    mid-write leaves a file that doesn't end in a newline. In that case the
+    last well may be incomplete: its rows are dropped and the file rewritten
+    so it is downloaded again.
+    """
+    with open(output_path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        torn = f.read(1) != b"\n"
+    with open(output_path, 'r', encoding='utf-8', newline='', buffering=CSV_READ_BUFFER) as f:
+        df = pd.read_csv(f, parse_dates=["Date"], date_format=DATE_FORMAT, on_bad_lines="skip",
+                         dtype={"WellNo": str, **dict.fromkeys(WELL_INFO_COLUMNS.values(), str)})
+    if torn:
+        if not df.empty:
+            df = df[df["Well_ID"] != df["Well_ID"].iloc[-1]]
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER) as f:
+            df.to_csv(f, index=False, date_format=DATE_FORMAT)
+    logger.info(f"⏩ Resuming interrupted scrape with {df['Well_ID'].nunique()} saved well(s)")
+    return df
+
+
+def scrape_coimbatore_data():
+    """Main scraping function for Coimbatore district - all wells at once.
+
+    A run starts fresh unless the SCRAPE_MARKER of an interrupted run is
+    present; then the wells already in the master CSV are kept and not
+    downloaded again. New wells are appended as they finish and the marker is
+    removed once a run completes with no failed wells, so failures are retried
+    by the next run. Returns every well as one DataFrame, or None if nothing
+    was scraped.
+    """
+    output_path = Path(DOWNLOAD_DIR) / OUTPUT_CSV_ALL
+    marker_path = Path(DOWNLOAD_DIR) / SCRAPE_MARKER
+
+    frames = []
+    if marker_path.exists() and output_path.exists() and output_path.stat().st_size > 0:
+        frames.append(load_partial_scrape(output_path))
+    else:
+        output_path.unlink(missing_ok=True)
+    marker_path.touch()
+    done = set(frames[0]["Well_ID"]) if frames else set()
+    fieldnames = list(frames[0].columns) if frames else []
+
+    with open(output_path, 'a', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER) as f:
+        stats = asyncio.run(scrape_coimbatore_data_async(frames, f, done, fieldnames))
+    if stats is not None and stats['wells_failed'] == 0:
+        marker_path.unlink(missing_ok=True)
+    if not frames:
+        return None
+
+    df = pd.concat(frames, ignore_index=True)
+    logger.info(f"📁 Output file: {output_path}")
+    return df.astype({col: "category" for col in CATEGORY_COLUMNS if col in df.columns})
 
 
 # ============================================================================
 # SCRIPT 2: DATA FILTER (2025 + SPECIFIC MONTHS)
 # ============================================================================
 
-def filter_cgwb_data():
+def filter_cgwb_data(df: pd.DataFrame):
+    """Keep the mid-month reading per well for the configured months; returns None on failure."""
     print("\n" + "="*60)
     print("STARTING DATA FILTERING FOR 2025")
     print("="*60)
 
-    INPUT_FILE = f"{DOWNLOAD_DIR}/{OUTPUT_CSV_ALL}"
-    OUTPUT_FILE = f"{DOWNLOAD_DIR}/{OUTPUT_CSV_FILTERED}"
-
-    path = Path(INPUT_FILE)
-    if not path.exists() or path.stat().st_size == 0:
-        print(f"❌ ERROR: Input file missing or empty: {INPUT_FILE}")
-        return False
-
-    try:
-        df = pd.read_csv(INPUT_FILE)
-    except Exception as e:
-        print(f"❌ ERROR reading CSV: {e}")
-        return False
+    if df is None or df.empty:
+        print("❌ ERROR: No scraped data to filter")
+        return None
 
     print(f"📊 Original data: {len(df)} rows")
 
@@ -322,42 +637,43 @@ def filter_cgwb_data():
     missing_cols = [col for col in required_cols if col not in df.columns]
     if missing_cols:
         print(f"❌ Missing columns: {missing_cols}")
-        return False
+        return None
 
     has_latlong = "Latitude" in df.columns and "Longitude" in df.columns
     if has_latlong:
         print("✅ Latitude and Longitude columns detected")
 
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    # Dates are parsed when each export is read; only coerce if some didn't parse.
+    # assign() returns new frames, so the caller's scraped data is never modified
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df = df.assign(Date=pd.to_datetime(df["Date"], errors="coerce"))
     df = df.dropna(subset=["Date"])
+    if "Water Level" in df.columns and not pd.api.types.is_numeric_dtype(df["Water Level"]):
+        df = df.assign(**{"Water Level": pd.to_numeric(df["Water Level"], errors="coerce")})
 
-    df_2025 = df[df["Date"].dt.year == YEAR].copy()
-    print(f"   Rows in {YEAR}: {len(df_2025)}")
+    dates = df["Date"].dt
+    in_year = dates.year == YEAR
+    rows_in_year = int(in_year.sum())
+    print(f"   Rows in {YEAR}: {rows_in_year}")
 
-    if len(df_2025) == 0:
+    if rows_in_year == 0:
         print(f"❌ No data for {YEAR}")
-        return False
+        return None
 
-    df_filtered = df_2025[df_2025["Date"].dt.month.isin(MONTHS_TO_KEEP)]
+    df_filtered = df.loc[in_year & dates.month.isin(MONTHS_TO_KEEP)].copy()
     print(f"   Rows after month filter: {len(df_filtered)}")
 
     if len(df_filtered) == 0:
         print("❌ No matching months")
-        return False
+        return None
 
     df_filtered["YearMonth"] = df_filtered["Date"].dt.to_period("M")
+    df_filtered["day_diff"] = (df_filtered["Date"].dt.day - 15).abs()
 
-    def pick_mid_month(group):
-        target = 15
-        group["day_diff"] = abs(group["Date"].dt.day - target)
-        return group.loc[group["day_diff"].idxmin()]
-
-    df_final = (
-        df_filtered.groupby(["Well_ID", "YearMonth"], as_index=False)
-        .apply(pick_mid_month)
-        .reset_index(drop=True)
-    )
-    df_final = df_final.drop(columns=["YearMonth", "day_diff"], errors="ignore")
+    # Keep the reading closest to mid-month for each well and month
+    idx = df_filtered.groupby(["Well_ID", "YearMonth"], observed=True)["day_diff"].idxmin()
+    df_final = df_filtered.loc[idx].reset_index(drop=True)
+    df_final = df_final.drop(columns=["YearMonth", "day_diff"])
 
     if has_latlong:
         metadata_cols = ["Well_ID", "Village", "Latitude", "Longitude", "Block", "Date"]
@@ -366,35 +682,26 @@ def filter_cgwb_data():
         df_final = df_final[existing_metadata + other_cols]
 
     df_final = df_final.sort_values(["Well_ID", "Date"])
-    df_final["Date"] = df_final["Date"].dt.strftime("%Y-%m-%d %H:%M:%S")
 
-    print(f"\n💾 Saving filtered data → {OUTPUT_FILE}")
-    df_final.to_csv(OUTPUT_FILE, index=False)
-    print("✅ FILTERING COMPLETE")
-    return True
+    print(f"✅ FILTERING COMPLETE: {len(df_final)} rows")
+    return df_final
 
 
 # ============================================================================
 # SCRIPT 3: DATA MERGER (PIVOT TO WIDE FORMAT)
 # ============================================================================
 
-def merge_well_readings():
+def merge_well_readings(df: pd.DataFrame):
+    """Pivot filtered readings to one row per well and save the merged CSV; returns None on failure."""
     print("\n" + "="*60)
     print("STARTING DATA MERGING (PIVOT)")
     print("="*60)
 
-    INPUT_FILE = f"{DOWNLOAD_DIR}/{OUTPUT_CSV_FILTERED}"
     OUTPUT_FILE = f"{DOWNLOAD_DIR}/{OUTPUT_CSV_MERGED}"
 
-    path = Path(INPUT_FILE)
-    if not path.exists():
-        print(f"❌ File not found: {INPUT_FILE}")
-        return False
-
-    df = pd.read_csv(INPUT_FILE)
-    if df.empty:
-        print("❌ CSV is empty")
-        return False
+    if df is None or df.empty:
+        print("❌ No filtered data to merge")
+        return None
 
     print(f"📊 Loaded {len(df)} rows")
 
@@ -402,9 +709,8 @@ def merge_well_readings():
     has_village = "Village" in df.columns
     has_block = "Block" in df.columns
 
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date"])
-    df["MonthName"] = df["Date"].dt.strftime("%b")
+    df = df.copy()
+    df["Month"] = df["Date"].dt.month.astype("int8")
 
     metadata_cols = ["Well_ID"]
     if has_village:
@@ -414,34 +720,40 @@ def merge_well_readings():
     if has_block:
         metadata_cols.append("Block")
 
-    df_pivot = df.pivot_table(
-        index="Well_ID",
-        columns="MonthName",
-        values="Water Level",
-        aggfunc="first"
-    ).reset_index()
+    # (Well_ID, Month) is already unique after the mid-month pick
+    df_pivot = (
+        df.drop_duplicates(subset=["Well_ID", "Month"], keep="first")
+        .set_index(["Well_ID", "Month"])["Water Level"]
+        .unstack("Month")
+        .rename(columns=MONTH_NAMES)
+        .reset_index()
+    )
 
-    df_metadata = df.groupby("Well_ID", as_index=False).first()[metadata_cols]
-    df_final = df_metadata.merge(df_pivot, on="Well_ID", how="left")
+    df_metadata = df.drop_duplicates("Well_ID", keep="first")[metadata_cols]
+    df_final = df_metadata.merge(df_pivot, on="Well_ID", how="left", validate="1:1")
 
-    month_order = ["Jan", "Apr", "Aug", "Nov"]
+    month_order = list(MONTH_NAMES.values())
     existing_months = [m for m in month_order if m in df_final.columns]
     final_cols = metadata_cols + existing_months
     df_final = df_final.reindex(columns=final_cols)
 
     if has_coords:
-        df_final["coordinates"] = df_final.apply(
-            lambda row: [
-                float(row["Latitude"]) if pd.notna(row["Latitude"]) and row["Latitude"] != "Unknown" else None,
-                float(row["Longitude"]) if pd.notna(row["Longitude"]) and row["Longitude"] != "Unknown" else None
-            ] if pd.notna(row["Latitude"]) and pd.notna(row["Longitude"]) else [None, None],
-            axis=1
-        )
+        # "Unknown" and missing values both coerce to NaN
+        lat = pd.to_numeric(df_final["Latitude"], errors="coerce").astype(object)
+        lon = pd.to_numeric(df_final["Longitude"], errors="coerce").astype(object)
+        # Scraped coordinates are the table's text ("10.52500"); write them as
+        # numbers like a re-read CSV would, keeping text such as "Unknown" as is
+        df_final["Latitude"] = lat.where(lat.notna(), df_final["Latitude"])
+        df_final["Longitude"] = lon.where(lon.notna(), df_final["Longitude"])
+        missing = lat.isna() | lon.isna()
+        lat = lat.mask(missing, None)
+        lon = lon.mask(missing, None)
+        df_final["coordinates"] = list(map(list, zip(lat, lon)))
 
     print(f"\n💾 Saving merged data → {OUTPUT_FILE}")
     df_final.to_csv(OUTPUT_FILE, index=False)
     print("✅ MERGING COMPLETE")
-    return True
+    return df_final
 
 
 # ============================================================================
@@ -450,39 +762,98 @@ def merge_well_readings():
 
 def connect_to_mongodb(mongo_url):
     try:
-        client = MongoClient(mongo_url)
+        client = MongoClient(
+            mongo_url,
+            maxPoolSize=MONGO_POOL_SIZE,
+            compressors=MONGO_COMPRESSORS,
+            retryWrites=True,
+            w=MONGO_WRITE_CONCERN
+        )
         client.server_info()
         logger.info("Connected to MongoDB")
 
         db = client[DATABASE_NAME]
         collection = db[COLLECTION_NAME]
-        collection.create_index("wellId", unique=True)
+        if "wellId_1" not in collection.index_information():
+            collection.create_indexes([
+                IndexModel([("wellId", ASCENDING)], unique=True, background=True, name="wellId_1")
+            ])
+            logger.info("Created unique index on wellId")
         return collection
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
 
-def parse_coordinates(coord_str):
-    try:
-        coord_str = coord_str.strip().strip('"').strip("'")
-        coord_str = coord_str.strip('[]')
-        parts = coord_str.split(',')
-        return [float(parts[0].strip()), float(parts[1].strip())]
-    except:
-        return None
-
-
-def import_well_data(collection, csv_file):
-    logger.info(f"Reading CSV for MongoDB import: {csv_file}")
+def classify_staged_wells(staging, collection, fields):
+    """Count staged wells that are new, would change, or already match the target.
+
+    One aggregation on the server looks each staged well up in the target
+    collection. A staged field that is absent leaves the target's value alone
+    under $merge, so only fields present in the staged document are compared.
+    """
+    def value(path):
+        return {"$ifNull": [path, None]}
+
+    changed = {"$or": [
+        {"$and": [
+            {"$ne": [value(f"$staged.{field}"), None]},
+            {"$ne": [value(f"$staged.{field}"), value(f"$current.{field}")]}
+        ]}
+        for field in fields
+    ]}
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for row in staging.aggregate([
+        # A wellId staged twice ends up as its last document, so count it once
+        {"$group": {"_id": "$wellId", "staged": {"$last": "$$ROOT"}}},
+        {"$lookup": {"from": collection.name, "localField": "_id",
+                     "foreignField": "wellId", "as": "current"}},
+        {"$project": {"found": {"$size": "$current"}, "staged": 1,
+                      "current": {"$arrayElemAt": ["$current", 0]}}},
+        {"$project": {"status": {"$cond": [
+            {"$eq": ["$found", 0]}, "inserted",
+            {"$cond": [changed, "updated", "unchanged"]}
+        ]}}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
+
+def merge_staged_wells(collection, docs, stats):
+    """Stage well documents and $merge them into the target collection on the server.
+
+    The staging collection is named per run so concurrent imports can't drop
+    each other's data. $merge reports no counts, so the staged wells are
+    classified against the target just before the merge.
+    """
+    staging = collection.database[f"{STAGING_COLLECTION_PREFIX}_{uuid.uuid4().hex}"]
+    fields = sorted({key for doc in docs for key in doc} - {"_id", "wellId"})
 
     try:
-        df = pd.read_csv(csv_file)
-    except Exception as e:
-        logger.error(f"CSV read error: {e}")
-        return
+        try:
+            staging.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                logger.error(f"Error staging {docs[err['index']]['wellId']}: {err.get('errmsg')}")
+                stats["errors"] += 1
+
+        stats.update(classify_staged_wells(staging, collection, fields))
+        staging.aggregate([
+            {"$project": {"_id": 0}},
+            {"$merge": {
+                "into": collection.name,
+                "on": "wellId",
+                "whenMatched": "merge",
+                "whenNotMatched": "insert"
+            }}
+        ])
+    finally:
+        staging.drop()
+
 
-    logger.info(f"Found {len(df)} wells in CSV")
+def import_well_data(collection, df: pd.DataFrame):
+    logger.info(f"Found {len(df)} wells to import")
 
     stats = {
         'inserted': 0,
@@ -492,72 +863,50 @@ def import_well_data(collection, csv_file):
         'errors': 0
     }
 
-    for idx, row in df.iterrows():
-        try:
-            if (
-                pd.isna(row["Latitude"]) or
-                pd.isna(row["Longitude"]) or
-                row["Latitude"] == "Unknown" or
-                row["Longitude"] == "Unknown"
-            ):
-                logger.warning(f"Skipping {row['Well_ID']}: Unknown coordinates")
-                stats['skipped'] += 1
-                continue
-
-            if pd.isna(row["Village"]) or row["Village"] == "Unknown":
-                logger.warning(f"Skipping {row['Well_ID']}: Unknown village")
-                stats['skipped'] += 1
-                continue
-
-            lat = float(row["Latitude"])
-            lon = float(row["Longitude"])
-
-            coords = None
-            if "coordinates" in row and pd.notna(row["coordinates"]):
-                coords = parse_coordinates(row["coordinates"])
-            if coords is None:
-                coords = [lat, lon]
-
-            well_doc = {
-                "wellId": str(row["Well_ID"]),
-                "village": str(row["Village"]),
-                "latitude": lat,
-                "longitude": lon,
-                "coordinates": coords
-            }
-
-            water_cols = {
-                "january": "Jan",
-                "april": "Apr",
-                "august": "Aug",
-                "november": "Nov"
-            }
-
-            for key, csv_col in water_cols.items():
-                if csv_col in row and pd.notna(row[csv_col]):
-                    well_doc[key] = float(row[csv_col])
-
-            result = collection.update_one(
-                {"wellId": well_doc["wellId"]},
-                {"$set": well_doc},
-                upsert=True
-            )
-
-            if result.upserted_id:
-                stats["inserted"] += 1
-                logger.info(f"Inserted: {well_doc['wellId']} - {well_doc['village']}")
-            elif result.modified_count > 0:
-                stats["updated"] += 1
-                logger.info(f"Updated: {well_doc['wellId']} - {well_doc['village']}")
-            else:
-                stats["unchanged"] += 1
-
-            if (stats["inserted"] + stats["updated"]) % 10 == 0:
-                logger.info(f"Progress: {idx + 1}/{len(df)} processed")
+    water_cols = {
+        "january": "Jan",
+        "april": "Apr",
+        "august": "Aug",
+        "november": "Nov"
+    }
 
-        except Exception as e:
-            logger.error(f"Error processing {row['Well_ID']}: {e}")
-            stats["errors"] += 1
+    lat = pd.to_numeric(df["Latitude"], errors="coerce")
+    lon = pd.to_numeric(df["Longitude"], errors="coerce")
+    valid_coords = lat.notna() & lon.notna()
+    valid_village = df["Village"].notna() & (df["Village"].astype(str) != "Unknown")
+
+    for well_id in df.loc[~valid_coords, "Well_ID"]:
+        logger.debug(f"Skipping {well_id}: Unknown coordinates")
+    for well_id in df.loc[valid_coords & ~valid_village, "Well_ID"]:
+        logger.debug(f"Skipping {well_id}: Unknown village")
+
+    mask = valid_coords & valid_village
+    stats['skipped'] = int((~mask).sum())
+    if stats['skipped']:
+        logger.warning(f"Skipping {stats['skipped']} well(s) with unknown coordinates or village")
+
+    clean = df.loc[mask]
+    docs_df = pd.DataFrame({
+        "wellId": clean["Well_ID"].astype(str),
+        "village": clean["Village"].astype(str),
+        "latitude": lat[mask],
+        "longitude": lon[mask]
+    })
+    docs_df["coordinates"] = docs_df[["latitude", "longitude"]].values.tolist()
+
+    month_keys = [key for key, csv_col in water_cols.items() if csv_col in clean.columns]
+    for key in month_keys:
+        docs_df[key] = pd.to_numeric(clean[water_cols[key]], errors="coerce")
+
+    # One C-level pass builds every document; missing readings are then left out
+    docs = docs_df.to_dict(orient="records")
+    for doc in docs:
+        for key in month_keys:
+            if pd.isna(doc[key]):
+                del doc[key]
+
+    if docs:
+        merge_staged_wells(collection, docs, stats)
 
     logger.info("\n" + "="*60)
     logger.info("IMPORT SUMMARY")
@@ -591,28 +940,33 @@ def main():
     
     # Step 1: Scrape
     logger.info("\n>>> STEP 1: WEB SCRAPING")
-    scrape_coimbatore_data()
+    df_all = scrape_coimbatore_data()
     
     # Step 2: Filter
     logger.info("\n>>> STEP 2: FILTERING 2025 DATA")
-    if not filter_cgwb_data():
+    df_filtered = filter_cgwb_data(df_all)
+    if df_filtered is None:
         logger.error("Filtering failed. Stopping pipeline.")
         return
     
     # Step 3: Merge/Pivot
     logger.info("\n>>> STEP 3: MERGING (PIVOT)")
-    if not merge_well_readings():
+    df_merged = merge_well_readings(df_filtered)
+    if df_merged is None:
         logger.error("Merging failed. Stopping pipeline.")
         return
     
     # Step 4: Import to MongoDB
     logger.info("\n>>> STEP 4: IMPORT TO MONGODB")
-    try:
-        collection = connect_to_mongodb(MONGODB_URI)
-        import_well_data(collection, CSV_FILE_FOR_MONGODB)
-        verify_data(collection)
-    except Exception as e:
-        logger.error(f"MongoDB import failed: {e}")
+    if not MONGODB_URI:
+        logger.error("MongoDB import failed: MONGO_URL is not set")
+    else:
+        try:
+            collection = connect_to_mongodb(MONGODB_URI)
+            import_well_data(collection, df_merged)
+            verify_data(collection)
+        except Exception as e:
+            logger.error(f"MongoDB import failed: {e}")
 
     logger.info("\n🎉 FULL PIPELINE COMPLETED SUCCESSFULLY!")
 
@@ -1,13 +1,29 @@
-import pandas as pd
-from pymongo import MongoClient
-from datetime import datetime
+import os
+import csv
+import math
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 import logging
 
 # Configuration
-MONGODB_URI = process.env.MONGO_URL;
+MONGODB_URI = os.environ.get("MONGO_URL")
 DATABASE_NAME = "Jal_Shakti"
 COLLECTION_NAME = "well_data"
+MONGO_POOL_SIZE = 50
+# zstd/snappy are used when their libraries are installed, zlib otherwise
+MONGO_COMPRESSORS = "zstd,snappy,zlib"
+# Acknowledged by a majority of the replica set; 1 acknowledges on the primary only
+MONGO_WRITE_CONCERN = "majority"
 CSV_FILE = "CGWB/Coimbatore_CGWB_2025_Merged.csv"
+BATCH_SIZE = 500
+# Batches written concurrently; must stay below MONGO_POOL_SIZE
+WRITE_WORKERS = 8
+CSV_READ_BUFFER = 1 << 20
+MISSING = (None, '', 'Unknown')
+# CSV month column -> document field
+MONTHS = (('Jan', 'january'), ('Apr', 'april'), ('Aug', 'august'), ('Nov', 'november'))
+_TRIM = str.maketrans('', '', "\"'[] \t\n")
 
 # Setup logging
 logging.basicConfig(
@@ -20,7 +36,13 @@ logger = logging.getLogger(__name__)
 def connect_to_mongodb(mongo_url):
     """Connect to MongoDB and return database and collection."""
     try:
-        client = MongoClient(mongo_url)
+        client = MongoClient(
+            mongo_url,
+            maxPoolSize=MONGO_POOL_SIZE,
+            compressors=MONGO_COMPRESSORS,
+            retryWrites=True,
+            w=MONGO_WRITE_CONCERN
+        )
         # Test connection
         client.server_info()
         logger.info(f"✅ Connected to MongoDB at {mongo_url}")
@@ -28,8 +50,9 @@ def connect_to_mongodb(mongo_url):
         db = client[DATABASE_NAME]
         collection = db[COLLECTION_NAME]
         
-        # Create unique index on wellId
-        collection.create_index("wellId", unique=True)
+        # Create unique index on wellId (skipped when it already exists)
+        if "wellId_1" not in collection.index_information():
+            collection.create_index("wellId", unique=True)
         logger.info(f"✅ Using database: {DATABASE_NAME}, collection: {COLLECTION_NAME}")
         
         return collection
@@ -41,118 +64,166 @@ def connect_to_mongodb(mongo_url):
 def parse_coordinates(coord_str):
     """Parse coordinates string '[10.525, 76.9994]' to list of floats."""
     try:
-        # Remove brackets and quotes, split by comma
-        coord_str = coord_str.strip().strip('"').strip("'")
-        coord_str = coord_str.strip('[]')
-        parts = coord_str.split(',')
-        lat = float(parts[0].strip())
-        lon = float(parts[1].strip())
-        return [lat, lon]
-    except:
+        # Drop brackets, quotes and whitespace in one pass, split on the first comma
+        lat, _, lon = coord_str.translate(_TRIM).partition(',')
+        return [float(lat), float(lon)]
+    except (AttributeError, ValueError):
         return None
 
 
+def _num(value):
+    """Return a CSV cell as float, or None when it is empty or NaN."""
+    if value in MISSING:
+        return None
+    number = float(value)
+    return None if math.isnan(number) else number
+
+
+def write_batch(collection, ops, well_ids):
+    """Send a batch of upserts in one round-trip and return its counts.
+
+    Runs on a worker thread; the shared MongoClient is thread-safe. Driver
+    errors are logged and counted here so one failed batch doesn't stop the import.
+    """
+    try:
+        details = collection.bulk_write(ops, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for err in details.get('writeErrors', []):
+            logger.error(f"❌ Error processing {well_ids[err['index']]}: {err.get('errmsg')}")
+    except PyMongoError as e:
+        logger.error(f"❌ Batch of {len(ops)} wells failed ({well_ids[0]} .. {well_ids[-1]}): {e}")
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': len(ops)}
+    
+    return {
+        'inserted': details.get('nUpserted', 0),
+        'updated': details.get('nModified', 0),
+        'unchanged': details.get('nMatched', 0) - details.get('nModified', 0),
+        'errors': len(details.get('writeErrors', []))
+    }
+
+
+def collect_batches(futures, stats):
+    """Add the counts of finished batch writes to stats."""
+    for future in futures:
+        for key, count in future.result().items():
+            stats[key] += count
+
+
 def import_well_data(collection, csv_file):
     """Read CSV and import/update data in MongoDB."""
     
     logger.info(f"📂 Reading CSV file: {csv_file}")
     
-    try:
-        df = pd.read_csv(csv_file)
-    except Exception as e:
-        logger.error(f"❌ Failed to read CSV: {e}")
-        return
-    
-    logger.info(f"📊 Found {len(df)} wells in CSV")
-    
     # Statistics
     stats = {
         'inserted': 0,
         'updated': 0,
+        'unchanged': 0,
         'skipped': 0,
         'errors': 0
     }
     
-    for idx, row in df.iterrows():
-        try:
-            # Skip if coordinates are Unknown
-            if (pd.isna(row['Latitude']) or 
-                pd.isna(row['Longitude']) or 
-                row['Latitude'] == 'Unknown' or 
-                row['Longitude'] == 'Unknown'):
-                logger.warning(f"⚠ Skipping {row['Well_ID']}: Unknown coordinates")
-                stats['skipped'] += 1
-                continue
-            
-            # Skip if village is Unknown
-            if pd.isna(row['Village']) or row['Village'] == 'Unknown':
-                logger.warning(f"⚠ Skipping {row['Well_ID']}: Unknown village")
-                stats['skipped'] += 1
-                continue
-            
-            # Parse coordinates
-            lat = float(row['Latitude'])
-            lon = float(row['Longitude'])
-            
-            # Parse coordinates array if available
-            coords = None
-            if 'coordinates' in row and pd.notna(row['coordinates']):
-                coords = parse_coordinates(row['coordinates'])
-            
-            # If parsing failed or not available, create from lat/lon
-            if coords is None:
-                coords = [lat, lon]
-            
-            # Prepare document
-            well_doc = {
-                'wellId': str(row['Well_ID']),
-                'village': str(row['Village']),
-                'latitude': lat,
-                'longitude': lon,
-                'coordinates': coords
-            }
-            
-            # Add water level data (only if not NaN)
-            if 'Jan' in row and pd.notna(row['Jan']):
-                well_doc['january'] = float(row['Jan'])
-            
-            if 'Apr' in row and pd.notna(row['Apr']):
-                well_doc['april'] = float(row['Apr'])
-            
-            if 'Aug' in row and pd.notna(row['Aug']):
-                well_doc['august'] = float(row['Aug'])
-            
-            if 'Nov' in row and pd.notna(row['Nov']):
-                well_doc['november'] = float(row['Nov'])
-            
-            # Insert or update in MongoDB
-            result = collection.update_one(
-                {'wellId': well_doc['wellId']},
-                {'$set': well_doc},
-                upsert=True
-            )
-            
-            if result.upserted_id:
-                stats['inserted'] += 1
-                logger.info(f"✅ Inserted: {well_doc['wellId']} - {well_doc['village']}")
-            else:
-                stats['updated'] += 1
-                logger.info(f"🔄 Updated: {well_doc['wellId']} - {well_doc['village']}")
+    ops = []
+    well_ids = []
+    total = 0
+    pending = set()
+    pool = ThreadPoolExecutor(max_workers=WRITE_WORKERS)
+    
+    try:
+        # Stream rows straight into the bulk writer instead of loading a DataFrame
+        with open(csv_file, 'r', newline='', encoding='utf-8', buffering=CSV_READ_BUFFER) as f:
+            reader = csv.DictReader(f)
             
-            # Show progress every 10 wells
-            if (stats['inserted'] + stats['updated']) % 10 == 0:
-                logger.info(f"   Progress: {stats['inserted'] + stats['updated']}/{len(df)} processed")
+            for row in reader:
+                total += 1
+                well_id = row.get('Well_ID')
+                
+                try:
+                    # Skip rows with Unknown coordinates
+                    if row.get('Latitude') in MISSING or row.get('Longitude') in MISSING:
+                        logger.debug(f"⚠ Skipping {well_id}: Unknown coordinates")
+                        stats['skipped'] += 1
+                        continue
+                    
+                    # Skip rows with Unknown village
+                    if row.get('Village') in MISSING:
+                        logger.debug(f"⚠ Skipping {well_id}: Unknown village")
+                        stats['skipped'] += 1
+                        continue
+                    
+                    lat = float(row['Latitude'])
+                    lon = float(row['Longitude'])
+                    
+                    # Parse coordinates array if available
+                    coords = None
+                    coord_str = row.get('coordinates')
+                    if coord_str not in MISSING:
+                        coords = parse_coordinates(coord_str)
+                    
+                    # If parsing failed or not available, create from lat/lon
+                    if coords is None:
+                        coords = [lat, lon]
+                    
+                    # Prepare document
+                    well_doc = {
+                        'wellId': well_id,
+                        'village': row['Village'],
+                        'latitude': lat,
+                        'longitude': lon,
+                        'coordinates': coords
+                    }
+                    
+                    # Add water level data (only if present)
+                    for src, dst in MONTHS:
+                        level = _num(row.get(src))
+                        if level is not None:
+                            well_doc[dst] = level
+                    
+                    # Queue the upsert; it is sent with the rest of its batch
+                    ops.append(UpdateOne(
+                        {'wellId': well_doc['wellId']},
+                        {'$set': well_doc},
+                        upsert=True
+                    ))
+                    well_ids.append(well_doc['wellId'])
+                
+                except Exception as e:
+                    logger.error(f"❌ Error processing {well_id}: {e}")
+                    stats['errors'] += 1
+                    continue
+                
+                if len(ops) >= BATCH_SIZE:
+                    pending.add(pool.submit(write_batch, collection, ops, well_ids))
+                    ops = []
+                    well_ids = []
+                    logger.info(f"   Progress: {total} rows read")
+                    
+                    # Keep at most one batch per worker queued so memory stays bounded
+                    if len(pending) >= 2 * WRITE_WORKERS:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect_batches(done, stats)
         
-        except Exception as e:
-            logger.error(f"❌ Error processing {row['Well_ID']}: {e}")
-            stats['errors'] += 1
-            continue
+        if ops:
+            pending.add(pool.submit(write_batch, collection, ops, well_ids))
+    except (OSError, csv.Error) as e:
+        logger.error(f"❌ Failed to read CSV: {e}")
+        return
+    finally:
+        # Batches already submitted are still written and counted
+        pool.shutdown(wait=True)
+        collect_batches(pending, stats)
+    
+    logger.info(f"📊 Found {total} wells in CSV")
+    if stats['skipped']:
+        logger.warning(f"⚠ Skipped {stats['skipped']} well(s) with unknown coordinates or village")
     
     # Print summary
     logger.info("\n" + "="*60)
     logger.info("🏁 IMPORT COMPLETED")
     logger.info(f"✅ Inserted: {stats['inserted']}")
     logger.info(f"🔄 Updated: {stats['updated']}")
+    logger.info(f"➖ Unchanged: {stats['unchanged']}")
     logger.info(f"⚠ Skipped: {stats['skipped']}")
     logger.info(f"❌ Errors: {stats['errors']}")
     logger.info(f"📊 Total in database: {collection.count_documents({})}")
@@ -178,6 +249,10 @@ def verify_data(collection):
 
 def main():
     """Main function to run the import."""
+    if not MONGODB_URI:
+        logger.error("❌ MONGO_URL is not set")
+        return
+    
     try:
         # Connect to MongoDB
         collection = connect_to_mongodb(MONGODB_URI)
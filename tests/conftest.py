@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURE_DIR = os.path.join(ROOT, "CGWB")
+
+
+@pytest.fixture
+def mongo_collection(monkeypatch):
+    """A mongomock collection whose aggregate() also runs a trailing $merge stage.
+
+    mongomock has no $merge, so the rest of the pipeline is run and its
+    output merged into the target by wellId the way the server does with
+    whenMatched "merge" / whenNotMatched "insert".
+    """
+    mongomock = pytest.importorskip("mongomock")
+    aggregate = mongomock.collection.Collection.aggregate
+
+    def aggregate_with_merge(self, pipeline, *args, **kwargs):
+        if not pipeline or "$merge" not in pipeline[-1]:
+            return aggregate(self, pipeline, *args, **kwargs)
+        spec = pipeline[-1]["$merge"]
+        target = self.database[spec["into"]]
+        for doc in aggregate(self, pipeline[:-1], *args, **kwargs):
+            doc.pop("_id", None)
+            target.update_one({spec["on"]: doc[spec["on"]]}, {"$set": doc}, upsert=True)
+        return iter([])
+
+    monkeypatch.setattr(mongomock.collection.Collection, "aggregate", aggregate_with_merge)
+    collection = mongomock.MongoClient().Jal_Shakti.well_data
+    collection.create_index("wellId", unique=True)
+    return collection
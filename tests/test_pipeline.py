@@ -0,0 +1,110 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from conftest import FIXTURE_DIR
+
+pytest.importorskip("playwright")
+import csv1
+
+
+@pytest.fixture
+def scraped(tmp_path, monkeypatch):
+    """The committed master CSV loaded the way a resumed scrape loads it."""
+    monkeypatch.chdir(tmp_path)
+    download_dir = tmp_path / csv1.DOWNLOAD_DIR
+    download_dir.mkdir()
+    output_path = download_dir / csv1.OUTPUT_CSV_ALL
+    shutil.copy(Path(FIXTURE_DIR) / csv1.OUTPUT_CSV_ALL, output_path)
+    df = csv1.load_partial_scrape(output_path)
+    return df.astype({col: "category" for col in csv1.CATEGORY_COLUMNS})
+
+
+@pytest.fixture
+def merged(scraped):
+    return csv1.merge_well_readings(csv1.filter_cgwb_data(scraped))
+
+
+def import_counts(collection, df, caplog):
+    """Run import_well_data and read the counts back from its summary."""
+    caplog.clear()
+    with caplog.at_level("INFO", logger=csv1.logger.name):
+        csv1.import_well_data(collection, df)
+    counts = {}
+    for record in caplog.records:
+        label, sep, value = record.getMessage().partition(":")
+        if sep and label.strip() in ("Inserted", "Updated", "Unchanged", "Skipped", "Errors"):
+            counts[label.strip().lower()] = int(value)
+    return counts
+
+
+def test_merge_reproduces_committed_csv(merged):
+    expected = (Path(FIXTURE_DIR) / csv1.OUTPUT_CSV_MERGED).read_bytes()
+    written = (Path(csv1.DOWNLOAD_DIR) / csv1.OUTPUT_CSV_MERGED).read_bytes()
+    assert written == expected
+
+
+def test_filter_keeps_mid_month_reading_per_month():
+    df = pd.DataFrame({
+        "Well_ID": ["W1"] * 5,
+        "Date": ["2025-01-02", "2025-01-14", "2025-01-29", "2025-02-15", "2024-04-15"],
+        "Water Level": ["1.0", "2.0", "3.0", "4.0", "5.0"]
+    })
+    filtered = csv1.filter_cgwb_data(df)
+
+    assert filtered["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2025-01-14"]
+    assert filtered["Water Level"].tolist() == [2.0]
+
+
+def test_filter_leaves_input_unchanged():
+    df = pd.DataFrame({
+        "Well_ID": ["W1", "W1"],
+        "Date": ["2025-04-15", "not a date"],
+        "Water Level": ["1.5", "2.5"]
+    })
+    before = df.copy()
+    csv1.filter_cgwb_data(df)
+
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_import_counts_inserted_then_unchanged(mongo_collection, merged, caplog):
+    first = import_counts(mongo_collection, merged, caplog)
+    second = import_counts(mongo_collection, merged, caplog)
+
+    loaded = first["inserted"]
+    assert loaded > 0
+    assert loaded + first["skipped"] == len(merged)
+    assert first["updated"] == first["unchanged"] == first["errors"] == 0
+    assert second == {**first, "inserted": 0, "unchanged": loaded}
+    assert mongo_collection.count_documents({}) == loaded
+
+
+def test_import_counts_changed_well_as_updated(mongo_collection, merged, caplog):
+    import_counts(mongo_collection, merged, caplog)
+    well_id = merged["Well_ID"].iloc[0]
+    changed = merged.assign(Nov=merged["Nov"].mask(merged["Well_ID"] == well_id, 99.0))
+
+    counts = import_counts(mongo_collection, changed, caplog)
+
+    assert counts["inserted"] == 0
+    assert counts["updated"] == 1
+    assert counts["unchanged"] == mongo_collection.count_documents({}) - 1
+    assert mongo_collection.find_one({"wellId": well_id})["november"] == 99.0
+
+
+def test_merge_keeps_readings_missing_from_new_documents(mongo_collection):
+    well = {"wellId": "W1", "village": "Anamalai", "latitude": 10.5, "longitude": 77.0,
+            "coordinates": [10.5, 77.0], "january": 3.0, "april": 4.0}
+    csv1.merge_staged_wells(mongo_collection, [dict(well)], {"errors": 0})
+
+    # A later import without the January reading neither changes nor clears it
+    without_january = {key: value for key, value in well.items() if key != "january"}
+    stats = {"errors": 0}
+    csv1.merge_staged_wells(mongo_collection, [without_january], stats)
+
+    assert stats == {"inserted": 0, "updated": 0, "unchanged": 1, "errors": 0}
+    assert mongo_collection.find_one({"wellId": "W1"})["january"] == 3.0
+    assert mongo_collection.database.list_collection_names() == ["well_data"]